@@ -41,6 +41,10 @@ class AICog(commands.Cog):
         
         # Custom error message
         self.custom_error_message = os.getenv('ERROR_MESSAGE', '').strip()
+    
+    async def cog_unload(self):
+        """Release resources held by the cog"""
+        await self.media_processor.close()
         
     async def _check_basic_permissions(self, message: discord.Message) -> bool:
         """Check if bot has basic permissions to operate in the channel"""
@@ -194,38 +198,29 @@ class AICog(commands.Cog):
             if isinstance(message.channel, discord.DMChannel):
                 return True
             
-            # Check if message is from a bot and bot-to-bot is not enabled
-            if message.author.bot and message.guild:
-                bot_to_bot_enabled = await self.bot.storage.is_bot_to_bot_enabled(
-                    message.guild.id, message.channel.id
-                )
-                if not bot_to_bot_enabled:
-                    return False
-            
             # Check guild settings
             if message.guild:
-                settings = await self.bot.storage.get_server_settings(message.guild.id)
+                # One cached view answers all per-message settings checks
+                view = await self.bot.storage.guild_view(message.guild.id)
+                channel_id = message.channel.id
                 
-                # Check channel in blacklist/whitelist
-                use_blacklist = settings.get("use_blacklist", False)
-                blacklist = settings.get("blacklist", [])
-                whitelist = settings.get("whitelist", [])
+                # Check if message is from a bot and bot-to-bot is not enabled
+                if message.author.bot and not view.bot_to_bot_channels.get(channel_id, False):
+                    return False
                 
                 # Check if channel is restricted
-                if use_blacklist:
+                if view.use_blacklist:
                     # Ignore blacklisted channels
-                    if message.channel.id in blacklist:
+                    if channel_id in view.blacklist:
                         return False
                 else:
                     # Only respond in whitelisted channels
-                    if whitelist:  # Only apply whitelist if it has channels
-                        if message.channel.id not in whitelist:
+                    if view.whitelist:  # Only apply whitelist if it has channels
+                        if channel_id not in view.whitelist:
                             return False
                 
                 # Check if specific channel is activated
-                is_channel_activated = await self.bot.storage.is_channel_activated(
-                    message.guild.id, message.channel.id
-                )
+                is_channel_activated = view.activated_channels.get(channel_id, False)
                 
                 # Check mentions and replies
                 is_mentioned_or_replied = (
@@ -241,9 +236,8 @@ class AICog(commands.Cog):
                 )
                 
                 # Check server-specific trigger words
-                server_trigger_words = await self.bot.storage.get_server_trigger_words(message.guild.id)
                 has_server_trigger_words = self.trigger_filter.check_trigger_words(
-                    message.content, server_trigger_words
+                    message.content, view.trigger_words
                 )
                 
                 has_trigger_words = has_global_trigger_words or has_server_trigger_words
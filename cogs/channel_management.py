@@ -60,12 +60,12 @@ class ChannelManagementCommand(commands.Cog):
     
     async def _show_channel_management(self, interaction: discord.Interaction, list_type: str):
         """Show channel management interface"""
-        settings = await self.bot.storage.get_server_settings(interaction.guild.id)
+        guild_view = await self.bot.storage.guild_view(interaction.guild.id)
         
         # Get current list
-        current_list = settings.get(list_type, [])
-        use_blacklist = settings.get("use_blacklist", False)
-        opposite_list = settings.get("whitelist" if list_type == "blacklist" else "blacklist", [])
+        current_list = getattr(guild_view, list_type)
+        use_blacklist = guild_view.use_blacklist
+        opposite_list = guild_view.whitelist if list_type == "blacklist" else guild_view.blacklist
         
         # Create embed
         embed = discord.Embed(
@@ -94,7 +94,7 @@ class ChannelManagementCommand(commands.Cog):
         # Show current channels
         if current_list:
             channel_mentions = []
-            for channel_id in current_list:
+            for channel_id in sorted(current_list):
                 channel = interaction.guild.get_channel(channel_id)
                 if channel:
                     channel_mentions.append(channel.mention)
@@ -117,7 +117,7 @@ class ChannelManagementCommand(commands.Cog):
         if opposite_list:
             opposite_name = "Whitelist" if list_type == "blacklist" else "Blacklist"
             opposite_mentions = []
-            for channel_id in opposite_list:
+            for channel_id in sorted(opposite_list):
                 channel = interaction.guild.get_channel(channel_id)
                 if channel:
                     opposite_mentions.append(channel.mention)
@@ -190,8 +190,8 @@ class ActionDropdown(discord.ui.Select):
             action = self.values[0]
             
             # Get current settings
-            settings = await self.bot.storage.get_server_settings(interaction.guild.id)
-            current_list = settings.get(self.list_type, [])
+            guild_view = await self.bot.storage.guild_view(interaction.guild.id)
+            current_list = getattr(guild_view, self.list_type)
             
             # Create channel selection dropdown
             if action == "add":
@@ -291,8 +291,7 @@ class ReviveChatCog(commands.Cog):
             
             while True:
                 # Check if still enabled
-                server_settings = await self.bot.storage.get_server_settings(guild_id)
-                settings = server_settings.get('revive_chat', {})
+                settings = await self.bot.storage.get_revive_chat_settings(guild_id)
 
                 if not settings.get('enabled', False):
                     logger.info(f"Revive chat disabled for guild {guild_id}, stopping scheduler")
@@ -312,11 +311,7 @@ class ReviveChatCog(commands.Cog):
                 next_time = datetime.now() + timedelta(minutes=interval_minutes)
                 
                 # Update next send time in storage
-                server_settings = await self.bot.storage.get_server_settings(guild_id)
-                if 'revive_chat' not in server_settings:
-                    server_settings['revive_chat'] = {}
-                server_settings['revive_chat']['next_send_time'] = next_time.isoformat()
-                await self.bot.storage.update_server_settings(guild_id, server_settings)
+                await self.bot.storage.update_revive_chat_next_time(guild_id, next_time.isoformat())
                 
                 logger.info(f"Next revive message for guild {guild_id} scheduled for {next_time}")
                 
@@ -47,7 +47,7 @@ class TriggerCommand(commands.Cog):
                     )
                 else:
                     # Format trigger words list with proper formatting
-                    formatted_words = [f"`{word}`" for word in trigger_words]
+                    formatted_words = [f"`{word}`" for word in sorted(trigger_words)]
                     words_text = ", ".join(formatted_words)
                     
                     # Split into multiple embeds if too long
@@ -107,7 +107,7 @@ class TriggerCommand(commands.Cog):
                 return
             
             # Clean and validate the word
-            word = word.strip().lower()
+            word = word.strip().casefold()
             
             if not word:
                 await interaction.response.send_message(
@@ -1,5 +1,7 @@
 import os
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import discord
 from discord.ext import commands
 from utils.storage import DataStorage
@@ -9,6 +11,9 @@ logger = logging.getLogger(__name__)
 class ShapesBot(commands.Bot):
     """Custom Discord bot class for Shapes integration"""
     
+    # Threads available for blocking media work (PIL, pydub, speech recognition)
+    MEDIA_WORKERS = 8
+    
     def __init__(self):
         # Configure bot intents
         intents = discord.Intents.default()
@@ -71,6 +76,16 @@ class ShapesBot(commands.Bot):
         logger.info(f"  - Owner ID: {self.bot_owner_id}")
         logger.info(f"  - Trigger words: {self.trigger_words}")
     
+    async def setup_hook(self):
+        """Prepare the event loop before connecting"""
+        # Media decoding and transcription run in the default executor
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=self.MEDIA_WORKERS, thread_name_prefix="media")
+        )
+        
+        # Load settings before events arrive so the first messages don't wait on disk
+        await self.storage.warm()
+    
     async def on_ready(self):
         """Called when the bot is ready"""
         logger.info("=" * 50)
@@ -126,6 +141,10 @@ class ShapesBot(commands.Bot):
     async def close(self):
         """Clean shutdown"""
         logger.info("Shutting down bot...")
+        try:
+            await self.storage.flush()
+        except Exception as e:
+            logger.error(f"Error saving data during shutdown: {e}")
         try:
             await super().close()
             logger.info("Bot shutdown completed")
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utils import storage
+from utils.storage import DataStorage
+
+
+class LegacyBlockedUsersMigrationTest(unittest.IsolatedAsyncioTestCase):
+    """Merging blocked_users.json into server settings must never lose data"""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self._tmp.name)
+        (self.data_dir / "server_settings.json").write_text(json.dumps({"1": {"activated": True}}))
+        (self.data_dir / "blocked_users.json").write_text(json.dumps({"1": [5, 6]}))
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    async def _stop_flusher(self, data_storage: DataStorage):
+        if data_storage._flush_task is not None:
+            data_storage._flush_task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await data_storage._flush_task
+    
+    async def test_failed_save_keeps_legacy_file(self):
+        data_storage = DataStorage(str(self.data_dir))
+        with mock.patch.object(storage, "_replace_file", side_effect=OSError("disk full")):
+            await data_storage.warm()
+            self.assertTrue(data_storage.legacy_blocked_users_file.exists())
+            self.assertIn(data_storage.server_settings_file, data_storage._dirty)
+            self.assertTrue(await data_storage.is_user_blocked(1, 5))
+            await self._stop_flusher(data_storage)
+        
+        on_disk = json.loads(data_storage.server_settings_file.read_text())
+        self.assertNotIn("blocked_users", on_disk["1"])
+    
+    async def test_successful_save_removes_legacy_file(self):
+        data_storage = DataStorage(str(self.data_dir))
+        await data_storage.warm()
+        
+        self.assertFalse(data_storage.legacy_blocked_users_file.exists())
+        on_disk = json.loads(data_storage.server_settings_file.read_text())
+        self.assertEqual(on_disk["1"]["blocked_users"], [5, 6])
+
+
+
+class LoadFailureTest(unittest.IsolatedAsyncioTestCase):
+    """A settings file that cannot be fully understood must never be overwritten"""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self._tmp.name)
+        self.settings_file = self.data_dir / "server_settings.json"
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    async def test_non_numeric_keys_are_kept(self):
+        self.settings_file.write_text(json.dumps({"123": {"activated": True}, "abc": {"x": 1}}))
+        data_storage = DataStorage(str(self.data_dir))
+        
+        await data_storage.set_server_activation(456, True)
+        await data_storage.flush()
+        
+        on_disk = json.loads(self.settings_file.read_text())
+        self.assertEqual(set(on_disk), {"123", "456", "abc"})
+        self.assertEqual(on_disk["abc"], {"x": 1})
+    
+    async def test_unreadable_file_is_not_overwritten(self):
+        original = '{"123": {"activated": true}, broken'
+        self.settings_file.write_text(original)
+        data_storage = DataStorage(str(self.data_dir))
+        
+        await data_storage.set_server_activation(456, True)
+        await data_storage.flush()
+        
+        self.assertEqual(self.settings_file.read_text(), original)
+        self.assertNotIn(self.settings_file, data_storage._dirty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,57 +6,188 @@ from PIL import Image
 import io
 import speech_recognition as sr
 from pydub import AudioSegment
-import tempfile
 import os
 import base64
-from typing import List, Optional, Tuple, Dict, Any
+import bisect
+import string
+import asyncio
+import hashlib
+import threading
+import itertools
+from collections import OrderedDict
+from functools import lru_cache
+from urllib.parse import urlparse
+from typing import List, Optional, Tuple, Dict, Any, Iterator
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
 
 logger = logging.getLogger(__name__)
 
+# File extensions used to classify media; supported image extensions map to their MIME type
+_AUDIO_EXTS = frozenset({'.mp3', '.wav', '.ogg', '.m4a'})
+_EXT_TO_MIME = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.webp': 'image/webp',
+    '.gif': 'image/gif'
+}
+
+# Largest media downloaded for processing; bigger files get a placeholder instead
+_MAX_IMAGE_BYTES = 15 * 1024 * 1024
+_MAX_AUDIO_BYTES = 25 * 1024 * 1024
+
+# Characters that make a trigger word part of a larger word
+_WORD_CHARS = frozenset(string.ascii_letters + string.digits)
+
+# Precompiled patterns used on every message/response
+# Applied to casefolded text, so no case-insensitive matching is needed
+_URL_RE = re.compile(
+    r'https?://[^\s<>"{}|\\^`\[\]]+|www\.[^\s<>"{}|\\^`\[\]]+|[a-z0-9][-a-z0-9]*\.[a-z]{2,}(?:/[^\s<>"{}|\\^`\[\]]*)?'
+)
+# Single class equivalent to the old per-character alternation: '$'-'_' covers digits,
+# uppercase letters and most URL punctuation (including '%' escapes)
+_MEDIA_URL_RE = re.compile(r'https?://[!$-_a-z]+')
+_SHAPES_FILE_RE = re.compile(r'https://files\.shapes\.inc/[^\s<>"\')]*')
+_WS_RE = re.compile(r'[ \t]+')
+_NL_RE = re.compile(r'\n{3,}')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+@lru_cache(maxsize=256)
+def _compile_trigger_regex(words: Tuple[str, ...]):
+    """
+    Compile one whole-word pattern matching any of the casefolded trigger words
+    
+    The alternation sits inside a lookahead so matches are zero-width and may
+    overlap, like scanning for each word separately.
+    """
+    alternation = '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+    return re.compile(r'(?<![a-zA-Z0-9])(?=(?:' + alternation + r')(?![a-zA-Z0-9]))')
+
+@lru_cache(maxsize=256)
+def _build_automaton(words: Tuple[str, ...]):
+    """Build an Aho-Corasick automaton over casefolded trigger words"""
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+def _probe_image(image_data: bytes) -> Tuple[Tuple[int, int], Optional[str]]:
+    """Read image dimensions and format with PIL (blocking)"""
+    with Image.open(io.BytesIO(image_data)) as img:
+        return img.size, img.format
+
+class _LRUCache:
+    """LRU cache bounded by the total size of its entries; with the default size of 1 per entry it is bounded by count"""
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Any, Tuple[Any, int]]" = OrderedDict()
+        self._total = 0
+    
+    def get(self, key):
+        """Look up an entry, marking it as recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+    
+    def put(self, key, value, size: int = 1):
+        """Store an entry of the given size, evicting the oldest until under budget"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total -= old[1]
+        # A single entry larger than the whole budget would only evict everything else
+        if size > self.max_size:
+            return
+        self._entries[key] = (value, size)
+        self._total += size
+        while self._total > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._total -= evicted_size
+    
+    def pop(self, key):
+        """Remove an entry if present"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total -= entry[1]
+
 class TriggerFilter:
     """Handles trigger word filtering"""
     
     @staticmethod
-    def _find_url_ranges(text: str) -> List[tuple]:
+    def _find_url_ranges(text_lower: str) -> Tuple[List[int], List[int]]:
         """
         Find all URL ranges in the text
         
         Args:
-            text: The text to search for URLs
+            text_lower: The lowercased text to search for URLs
             
         Returns:
-            List of tuples containing (start_index, end_index) for each URL
+            Tuple of (starts, ends) lists, sorted by start index
         """
-        # URL regex pattern to catch various URL formats
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+|www\.[^\s<>"{}|\\^`\[\]]+|[a-zA-Z0-9][-a-zA-Z0-9]*\.[a-zA-Z]{2,}(?:/[^\s<>"{}|\\^`\[\]]*)?'
-        
-        url_ranges = []
-        for match in re.finditer(url_pattern, text, re.IGNORECASE):
-            url_ranges.append((match.start(), match.end()))
+        starts = []
+        ends = []
+        for match in _URL_RE.finditer(text_lower):
+            starts.append(match.start())
+            ends.append(match.end())
         
-        return url_ranges
+        return starts, ends
     
     @staticmethod
-    def _is_in_url(position: int, url_ranges: List[tuple]) -> bool:
+    def _is_in_url(position: int, starts: List[int], ends: List[int]) -> bool:
         """
         Check if a position is within any URL range
         
         Args:
             position: The position to check
-            url_ranges: List of URL ranges
+            starts: Sorted URL start indices
+            ends: URL end indices matching starts
             
         Returns:
             True if position is within a URL, False otherwise
         """
-        for start, end in url_ranges:
-            if start <= position < end:
-                return True
-        return False
+        # URL matches never overlap, so only the last range starting at or before position can contain it
+        i = bisect.bisect_right(starts, position) - 1
+        return i >= 0 and position < ends[i]
+    
+    @staticmethod
+    def _iter_trigger_starts(message_lower: str, words: Tuple[str, ...]) -> Iterator[int]:
+        """
+        Yield start indices of whole-word trigger word matches
+        
+        Uses an Aho-Corasick automaton when pyahocorasick is installed, otherwise
+        a single alternation regex.
+        """
+        if ahocorasick is None:
+            for match in _compile_trigger_regex(words).finditer(message_lower):
+                yield match.start()
+            return
+        
+        # Single pass over the message for all trigger words, then check word boundaries
+        last_index = len(message_lower) - 1
+        for end, word in _build_automaton(words).iter(message_lower):
+            start = end - len(word) + 1
+            if start > 0 and message_lower[start - 1] in _WORD_CHARS:
+                continue
+            if end < last_index and message_lower[end + 1] in _WORD_CHARS:
+                continue
+            yield start
     
     @staticmethod
     def check_trigger_words(message_content: str, trigger_words: List[str]) -> bool:
         """
-        Check if message contains any trigger words using regex, ignoring words in URLs
+        Check if message contains any trigger words, ignoring words in URLs
         
         Args:
             message_content: The message content to check
@@ -68,132 +199,269 @@ class TriggerFilter:
         if not trigger_words or not message_content:
             return False
         
-        message_lower = message_content.lower()
+        # Canonical form so equal trigger lists share one cached automaton/regex
+        words = tuple(sorted({word.casefold() for word in trigger_words if word}))
+        if not words:
+            return False
         
-        # Find all URL ranges in the message
-        url_ranges = TriggerFilter._find_url_ranges(message_content)
+        message_lower = message_content.casefold()
         
-        for trigger_word in trigger_words:
-            if not trigger_word:
-                continue
-                
-            trigger_lower = trigger_word.lower()
-            # Use regex to match whole words only
-            pattern = r'(?<![a-zA-Z0-9])' + re.escape(trigger_lower) + r'(?![a-zA-Z0-9])'
+        # Without Aho-Corasick, a substring prefilter spares most messages the regex scan;
+        # the automaton already finds every word in one pass, so it needs none
+        if ahocorasick is None and not any(word in message_lower for word in words):
+            return False
+        
+        # URL ranges are only needed once a whole-word match is found
+        url_ranges = None
+        
+        # Always the full canonical tuple, so the cached automaton/regex is reused across messages
+        for start in TriggerFilter._iter_trigger_starts(message_lower, words):
+            if url_ranges is None:
+                url_ranges = TriggerFilter._find_url_ranges(message_lower)
             
-            for match in re.finditer(pattern, message_lower):
-                # Check if this match is within a URL
-                if not TriggerFilter._is_in_url(match.start(), url_ranges):
-                    return True
+            # Check if this match is within a URL
+            if not TriggerFilter._is_in_url(start, *url_ranges):
+                return True
         
         return False
 
 class MediaProcessor:
     """Processes images, audio, and stickers"""
     
+    # Local Whisper model size used when faster-whisper is installed
+    WHISPER_MODEL_SIZE = "base"
+    
+    # Entries kept in the per-processor LRU result caches
+    TRANSCRIPTION_CACHE_SIZE = 256
+    # Total base64 bytes kept for encoded images; one 15 MB image encodes to about 20 MB
+    IMAGE_CACHE_BYTES = 64 * 1024 * 1024
+    # Total raw bytes kept for downloaded audio attachments
+    ATTACHMENT_CACHE_BYTES = 64 * 1024 * 1024
+    
     def __init__(self):
         self.recognizer = sr.Recognizer()
-        self.supported_formats = ['.png', '.jpg', '.jpeg', '.webp', '.gif']
+        # Fixed recognizer settings: no adaptive energy calibration, fail fast on slow STT requests
+        self.recognizer.energy_threshold = 300
+        self.recognizer.dynamic_energy_threshold = False
+        self.recognizer.pause_threshold = 0.5
+        self.recognizer.operation_timeout = 10
+        self._whisper = None  # Loaded on first transcription
+        self._whisper_lock = threading.Lock()  # Executor threads may race to load it
+        self._session: Optional[aiohttp.ClientSession] = None  # Shared HTTP session for downloads
+        self._media_semaphore = asyncio.Semaphore(8)  # Bounds concurrent downloads per processor
+        self._transcription_cache = _LRUCache(self.TRANSCRIPTION_CACHE_SIZE)  # Keyed by audio digest
+        self._image_b64_cache = _LRUCache(self.IMAGE_CACHE_BYTES)  # Keyed by attachment id or URL
+        self._attachment_bytes_cache = _LRUCache(self.ATTACHMENT_CACHE_BYTES)  # Keyed by attachment id
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=50, ttl_dns_cache=300, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _url_extension(url: str) -> str:
+        """Lowercase file extension of a URL's path, ignoring query and fragment"""
+        return os.path.splitext(urlparse(url).path)[1].lower()
+    
+    @staticmethod
+    def _url_filename(url: str, default: str) -> str:
+        """Last path segment of a URL, without the query string CDN links carry"""
+        return urlparse(url).path.rsplit('/', 1)[-1] or default
+    
+    @staticmethod
+    async def _read_response(response: aiohttp.ClientResponse, max_bytes: int) -> Optional[bytes]:
+        """Read a response body, giving up once it exceeds max_bytes"""
+        if response.content_length is not None and response.content_length > max_bytes:
+            return None
+        
+        # Content-Length may be missing or wrong, so count while streaming
+        chunks = []
+        total = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            total += len(chunk)
+            if total > max_bytes:
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
+    
+    async def _read_attachment(self, attachment: discord.Attachment, cache: bool = True) -> bytes:
+        """Download an attachment's bytes once, sharing them between consumers"""
+        data = self._attachment_bytes_cache.get(attachment.id)
+        if data is None:
+            data = await attachment.read()
+            if cache:
+                self._attachment_bytes_cache.put(attachment.id, data, len(data))
+        return data
     
     def _is_image(self, attachment):
         """Check if an attachment is a supported image format."""
-        return any(attachment.filename.lower().endswith(ext) for ext in self.supported_formats)
+        return os.path.splitext(attachment.filename)[1].lower() in _EXT_TO_MIME
     
-    async def _process_image_to_base64(self, attachment):
-        """Process an image attachment into base64 format."""
-        try:
-            # Download the image
-            image_data = await attachment.read()
+    def _encode_image(self, image_data: bytes, filename: str) -> Dict[str, str]:
+        """Encode downloaded image bytes into the base64 payload sent to the API"""
+        # Get the MIME type based on file extension, defaulting to JPEG
+        mime_type = _EXT_TO_MIME.get(os.path.splitext(filename)[1].lower(), 'image/jpeg')
+        
+        # Convert to base64; the output is pure ASCII so skip the UTF-8 decoder
+        base64_data = base64.b64encode(image_data).decode('ascii')
+        
+        return {
+            'data': base64_data,
+            'mime_type': mime_type,
+            'filename': filename
+        }
+    
+    async def _process_image(self, *, attachment: Optional[discord.Attachment] = None,
+                             url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Download an image once and build its base64 payload and dimensions
+        
+        Args:
+            attachment: Image attachment to process
+            url: Image URL to process when no attachment is given
             
-            # Get the MIME type based on file extension
-            file_ext = attachment.filename.lower()
-            if file_ext.endswith('.png'):
-                mime_type = 'image/png'
-            elif file_ext.endswith('.jpg') or file_ext.endswith('.jpeg'):
-                mime_type = 'image/jpeg'
-            elif file_ext.endswith('.webp'):
-                mime_type = 'image/webp'
-            elif file_ext.endswith('.gif'):
-                mime_type = 'image/gif'
+        Returns:
+            Dict with data, mime_type, filename and, when known from attachment metadata
+            or a PIL probe, size and format
+        """
+        key = attachment.id if attachment is not None else url
+        cached = self._image_b64_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            if attachment is not None:
+                # The encoded result is cached instead, so the raw bytes are not kept
+                image_data = await self._read_attachment(attachment, cache=False)
+                filename = attachment.filename
             else:
-                # Default mime type if not specifically matched
-                mime_type = 'image/jpeg'
-            
-            # Convert to base64
-            base64_data = base64.b64encode(image_data).decode('utf-8')
+                session = await self._get_session()
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        return None
+                    image_data = await self._read_response(response, _MAX_IMAGE_BYTES)
+                if image_data is None:
+                    logger.info(f"Skipping image URL over {_MAX_IMAGE_BYTES} bytes: {url}")
+                    return None
+                filename = self._url_filename(url, "image")
             
-            return {
-                'data': base64_data,
-                'mime_type': mime_type,
-                'filename': attachment.filename
-            }
+            image = self._encode_image(image_data, filename)
         except Exception as e:
-            logger.error(f"Error processing image: {str(e)}")
+            logger.error(f"Error processing image {key}: {e}")
             return None
+        
+        if attachment is not None and attachment.width and attachment.height and attachment.content_type:
+            # Discord reports dimensions for image attachments, so no decode is needed
+            image['size'] = f"{attachment.width}x{attachment.height}"
+            image['format'] = attachment.content_type.split('/')[-1].upper()
+        else:
+            # Dimensions only enrich the description; an unreadable header still sends the image
+            try:
+                loop = asyncio.get_running_loop()
+                (width, height), format_name = await loop.run_in_executor(None, _probe_image, image_data)
+                image['size'] = f"{width}x{height}"
+                image['format'] = format_name
+            except Exception as e:
+                logger.debug(f"Could not read image dimensions for {filename}: {e}")
+        
+        self._image_b64_cache.put(key, image, len(image['data']))
+        if attachment is not None:
+            self._attachment_bytes_cache.pop(attachment.id)
+        return image
     
-    async def _process_image_url_to_base64(self, url: str):
-        """Process an image URL into base64 format."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        
-                        # Get filename and determine MIME type
-                        filename = url.split('/')[-1] or "image"
-                        file_ext = filename.lower()
-                        
-                        if file_ext.endswith('.png'):
-                            mime_type = 'image/png'
-                        elif file_ext.endswith('.jpg') or file_ext.endswith('.jpeg'):
-                            mime_type = 'image/jpeg'
-                        elif file_ext.endswith('.webp'):
-                            mime_type = 'image/webp'
-                        elif file_ext.endswith('.gif'):
-                            mime_type = 'image/gif'
-                        else:
-                            mime_type = 'image/jpeg'
-                        
-                        # Convert to base64
-                        base64_data = base64.b64encode(image_data).decode('utf-8')
-                        
-                        return {
-                            'data': base64_data,
-                            'mime_type': mime_type,
-                            'filename': filename
-                        }
-        except Exception as e:
-            logger.error(f"Error processing image URL {url}: {e}")
-            return None
+    @staticmethod
+    def _image_description(label: str, image: Dict[str, Any]) -> str:
+        """Describe a processed image, including its dimensions when known"""
+        if 'size' in image:
+            return f"[{label}: {image['filename']} ({image['size']}, {image['format']})]"
+        return f"[{label}: {image['filename']}]"
+    
+    @staticmethod
+    def _image_media_entry(image: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the media_data entry for an encoded image"""
+        return {'type': 'image_base64', **image}
     
     async def process_message_media(self, message: discord.Message) -> Tuple[str, List[Dict[str, Any]]]:
         """
         Process all media in a message and return text description + media data
         
+        Attachments, stickers and media URLs are processed concurrently; the
+        output keeps that order.
+        
         Args:
             message: Discord message object
             
         Returns:
             Tuple of (text_description, media_data_list)
         """
+        # URLs already handled in this message, so repeated links are processed once
+        seen = set()
+        tasks = []
+        
+        for attachment in message.attachments:
+            if attachment.url not in seen:
+                seen.add(attachment.url)
+                tasks.append(self._handle_attachment(attachment))
+        
+        for sticker in message.stickers:
+            tasks.append(self._handle_sticker(sticker))
+        
+        # Check for image/audio URLs in message content
+        if message.content:
+            for url in _MEDIA_URL_RE.findall(message.content):
+                if url not in seen:
+                    seen.add(url)
+                    tasks.append(self._handle_url(url))
+        
         text_parts = []
         media_data = []
         
-        # Process attachments
-        for attachment in message.attachments:
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing message media: {result}")
+                continue
+            texts, data = result
+            text_parts.extend(texts)
+            media_data.extend(data)
+        
+        return " ".join(text_parts), media_data
+    
+    async def _handle_attachment(self, attachment: discord.Attachment) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Process one attachment into text parts and media data"""
+        text_parts = []
+        media_data = []
+        
+        async with self._media_semaphore:
             try:
                 if attachment.content_type:
-                    if attachment.content_type.startswith('image/') and self._is_image(attachment):
+                    # Attachment size is known up front, so oversized media is never downloaded
+                    if attachment.content_type.startswith('image/'):
+                        max_bytes = _MAX_IMAGE_BYTES
+                    elif attachment.content_type.startswith('audio/'):
+                        max_bytes = _MAX_AUDIO_BYTES
+                    else:
+                        max_bytes = None
+                    
+                    if max_bytes is not None and attachment.size > max_bytes:
+                        text_parts.append(f"[Attachment too large: {attachment.filename}]")
+                    
+                    elif attachment.content_type.startswith('image/') and self._is_image(attachment):
                         # Process image for API
-                        image_base64 = await self._process_image_to_base64(attachment)
-                        if image_base64:
-                            text_parts.append(f"[Image: {attachment.filename}]")
-                            media_data.append({
-                                'type': 'image_base64',
-                                'data': image_base64['data'],
-                                'mime_type': image_base64['mime_type'],
-                                'filename': image_base64['filename']
-                            })
+                        image = await self._process_image(attachment=attachment)
+                        if image:
+                            text_parts.append(self._image_description("Image", image))
+                            media_data.append(self._image_media_entry(image))
                         else:
                             text_parts.append(f"[Image: {attachment.filename} (failed to process)]")
                     
@@ -215,98 +483,72 @@ class MediaProcessor:
                 logger.error(f"Error processing attachment {attachment.filename}: {e}")
                 text_parts.append(f"[Unable to process {attachment.filename}]")
         
-        # Process stickers
-        for sticker in message.stickers:
+        return text_parts, media_data
+    
+    async def _handle_sticker(self, sticker: discord.Sticker) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Process one sticker into text parts and media data"""
+        try:
+            text, data = await self._process_sticker(sticker)
+            return ([text] if text else []), ([data] if data else [])
+        except Exception as e:
+            logger.error(f"Error processing sticker {sticker.name}: {e}")
+            return [f"[Sticker: {sticker.name}]"], []
+    
+    async def _handle_url(self, url: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Process one image/audio URL from message content into text parts and media data"""
+        text_parts = []
+        media_data = []
+        
+        ext = self._url_extension(url)
+        if ext not in _EXT_TO_MIME and ext not in _AUDIO_EXTS:
+            return text_parts, media_data
+        
+        async with self._media_semaphore:
             try:
-                text, data = await self._process_sticker(sticker)
-                if text:
-                    text_parts.append(text)
-                if data:
-                    media_data.append(data)
+                if ext in _EXT_TO_MIME:
+                    image = await self._process_image(url=url)
+                    if image:
+                        text_parts.append(self._image_description("Image from URL", image))
+                        media_data.append(self._image_media_entry(image))
+                    else:
+                        text_parts.append(f"[Image from URL (failed to process)]")
+                
+                else:
+                    text, data = await self._process_audio_url(url)
+                    if text:
+                        text_parts.append(text)
+                    if data:
+                        media_data.append(data)
             except Exception as e:
-                logger.error(f"Error processing sticker {sticker.name}: {e}")
-                text_parts.append(f"[Sticker: {sticker.name}]")
-        
-        # Check for image/audio URLs in message content
-        if message.content:
-            urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', message.content)
-            for url in urls:
-                try:
-                    if any(ext in url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
-                        image_base64 = await self._process_image_url_to_base64(url)
-                        if image_base64:
-                            text_parts.append(f"[Image from URL: {image_base64['filename']}]")
-                            media_data.append({
-                                'type': 'image_base64',
-                                'data': image_base64['data'],
-                                'mime_type': image_base64['mime_type'],
-                                'filename': image_base64['filename']
-                            })
-                        else:
-                            text_parts.append(f"[Image from URL (failed to process)]")
-                    
-                    elif any(ext in url.lower() for ext in ['.mp3', '.wav', '.ogg', '.m4a']):
-                        text, data = await self._process_audio_url(url)
-                        if text:
-                            text_parts.append(text)
-                        if data:
-                            media_data.append(data)
-                except Exception as e:
-                    logger.error(f"Error processing URL {url}: {e}")
+                logger.error(f"Error processing URL {url}: {e}")
         
-        return " ".join(text_parts), media_data
+        return text_parts, media_data
     
-    async def _process_image_attachment(self, attachment: discord.Attachment) -> Tuple[str, Optional[Dict[str, Any]]]:
-        """Process image attachment"""
-        try:
-            # Download image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(attachment.url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        
-                        # Basic image analysis
-                        with Image.open(io.BytesIO(image_data)) as img:
-                            width, height = img.size
-                            format_name = img.format
-                            
-                        description = f"[Image: {attachment.filename} ({width}x{height}, {format_name})]"
-                        
-                        return description, {
-                            'type': 'image_url',
-                            'image_url': {'url': attachment.url},
-                            'filename': attachment.filename,
-                            'size': f"{width}x{height}",
-                            'format': format_name
-                        }
-        except Exception as e:
-            logger.error(f"Error processing image {attachment.filename}: {e}")
+    async def _describe_audio(self, audio_data: bytes, filename: str, url: str,
+                              label: str) -> Tuple[str, Dict[str, Any]]:
+        """Transcribe downloaded audio and build its description and media entry"""
+        transcription = await self._transcribe_audio(audio_data, filename)
+        
+        if transcription:
+            description = f"[{label}: \"{transcription}\"]"
+        else:
+            description = f"[{label}: {filename}]"
         
-        return f"[Image: {attachment.filename}]", None
+        return description, {
+            'type': 'audio_url',
+            'audio_url': {'url': url},
+            'filename': filename,
+            'transcription': transcription
+        }
     
     async def _process_audio_attachment(self, attachment: discord.Attachment) -> Tuple[str, Optional[Dict[str, Any]]]:
         """Process audio attachment"""
         try:
             # Download audio
-            async with aiohttp.ClientSession() as session:
-                async with session.get(attachment.url) as response:
-                    if response.status == 200:
-                        audio_data = await response.read()
-                        
-                        # Try to transcribe audio
-                        transcription = await self._transcribe_audio(audio_data, attachment.filename)
-                        
-                        if transcription:
-                            description = f"[Audio message: \"{transcription}\"]"
-                        else:
-                            description = f"[Audio file: {attachment.filename}]"
-                        
-                        return description, {
-                            'type': 'audio_url',
-                            'audio_url': {'url': attachment.url},
-                            'filename': attachment.filename,
-                            'transcription': transcription
-                        }
+            audio_data = await self._read_attachment(attachment)
+            return await self._describe_audio(
+                audio_data, attachment.filename, attachment.url, "Audio message"
+            )
         except Exception as e:
             logger.error(f"Error processing audio {attachment.filename}: {e}")
         
@@ -338,93 +580,80 @@ class MediaProcessor:
         
         return f"[Sticker: {sticker.name}]", None
     
-    async def _process_image_url(self, url: str) -> Tuple[str, Optional[Dict[str, Any]]]:
-        """Process image URL"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        
-                        with Image.open(io.BytesIO(image_data)) as img:
-                            width, height = img.size
-                            format_name = img.format
-                        
-                        filename = url.split('/')[-1] or "image"
-                        description = f"[Image from URL: {filename} ({width}x{height})]"
-                        
-                        return description, {
-                            'type': 'image_url',
-                            'image_url': {'url': url},
-                            'filename': filename,
-                            'size': f"{width}x{height}",
-                            'format': format_name
-                        }
-        except Exception as e:
-            logger.error(f"Error processing image URL {url}: {e}")
-        
-        return f"[Image from URL]", None
-    
     async def _process_audio_url(self, url: str) -> Tuple[str, Optional[Dict[str, Any]]]:
         """Process audio URL"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        audio_data = await response.read()
-                        filename = url.split('/')[-1] or "audio"
-                        
-                        transcription = await self._transcribe_audio(audio_data, filename)
-                        
-                        if transcription:
-                            description = f"[Audio from URL: \"{transcription}\"]"
-                        else:
-                            description = f"[Audio from URL: {filename}]"
-                        
-                        return description, {
-                            'type': 'audio_url', 
-                            'audio_url': {'url': url},
-                            'filename': filename,
-                            'transcription': transcription
-                        }
+            session = await self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    audio_data = await self._read_response(response, _MAX_AUDIO_BYTES)
+                    if audio_data is None:
+                        return f"[Audio from URL too large]", None
+                    filename = self._url_filename(url, "audio")
+                    return await self._describe_audio(audio_data, filename, url, "Audio from URL")
         except Exception as e:
             logger.error(f"Error processing audio URL {url}: {e}")
         
         return f"[Audio from URL]", None
     
+    def _get_whisper_model(self):
+        """Load the local Whisper model on first use"""
+        if self._whisper is None:
+            with self._whisper_lock:
+                # Another thread may have loaded it while we waited
+                if self._whisper is None:
+                    self._whisper = WhisperModel(self.WHISPER_MODEL_SIZE, device="auto", compute_type="int8")
+        return self._whisper
+    
+    def _whisper_transcribe(self, audio_data: bytes) -> Optional[str]:
+        """Transcribe audio with the local Whisper model (blocking)"""
+        segments, _ = self._get_whisper_model().transcribe(io.BytesIO(audio_data), beam_size=1)
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        return text or None
+    
     async def _transcribe_audio(self, audio_data: bytes, filename: str) -> Optional[str]:
-        """Transcribe audio data to text"""
-        try:
-            # Create temporary files
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as temp_input:
-                temp_input.write(audio_data)
-                temp_input_path = temp_input.name
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_wav:
-                temp_wav_path = temp_wav.name
-            
+        """Transcribe audio data to text, reusing earlier results for identical audio"""
+        digest = hashlib.blake2b(audio_data, digest_size=16).digest()
+        cached = self._transcription_cache.get(digest)
+        if cached is not None:
+            return cached
+        
+        transcription = await self._run_transcription(audio_data, filename)
+        # Only successes are cached so transient STT failures can be retried
+        if transcription:
+            self._transcription_cache.put(digest, transcription)
+        return transcription
+    
+    async def _run_transcription(self, audio_data: bytes, filename: str) -> Optional[str]:
+        """Transcribe audio with local Whisper or Google Web Speech"""
+        # Prefer local transcription, fall back to Google Web Speech if unavailable
+        if WhisperModel is not None:
             try:
-                # Convert to WAV format
-                audio = AudioSegment.from_file(temp_input_path)
-                audio.export(temp_wav_path, format="wav")
-                
-                # Transcribe using speech_recognition
-                with sr.AudioFile(temp_wav_path) as source:
-                    audio_data = self.recognizer.record(source)
-                    text = self.recognizer.recognize_google(audio_data)
-                    return text
-                    
-            finally:
-                # Clean up temporary files
-                try:
-                    os.unlink(temp_input_path)
-                    os.unlink(temp_wav_path)
-                except:
-                    pass
-                    
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, self._whisper_transcribe, audio_data)
+            except Exception as e:
+                logger.debug(f"Local transcription failed for {filename}, falling back to Google: {e}")
+        
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._sync_transcribe, audio_data)
         except Exception as e:
             logger.debug(f"Audio transcription failed for {filename}: {e}")
             return None
+    
+    def _sync_transcribe(self, audio_data: bytes) -> Optional[str]:
+        """Convert audio to WAV and transcribe it with Google Web Speech (blocking)"""
+        # Convert to WAV in memory; no format hint, so ffmpeg detects the container from the data
+        # (file extensions such as .opus/.oga/.m4a are not all ffmpeg demuxer names)
+        audio = AudioSegment.from_file(io.BytesIO(audio_data))
+        wav_buffer = io.BytesIO()
+        audio.export(wav_buffer, format="wav")
+        wav_buffer.seek(0)
+        
+        with sr.AudioFile(wav_buffer) as source:
+            recorded = self.recognizer.record(source)
+        
+        return self.recognizer.recognize_google(recorded)
 
 class ResponseProcessor:
     """Processes bot responses to handle Shapes file URLs"""
@@ -440,15 +669,14 @@ class ResponseProcessor:
         Returns:
             Tuple of (cleaned_content, file_urls)
         """
-        shapes_file_pattern = r'https://files\.shapes\.inc/[^\s<>"\')]*'
-        shapes_files = re.findall(shapes_file_pattern, content)
+        shapes_files = _SHAPES_FILE_RE.findall(content)
         
         # Remove the URLs from content
-        cleaned_content = re.sub(shapes_file_pattern, '', content)
+        cleaned_content = _SHAPES_FILE_RE.sub('', content)
         
         # Clean up extra whitespace
-        cleaned_content = re.sub(r'[ \t]+', ' ', cleaned_content)
-        cleaned_content = re.sub(r'\n{3,}', '\n\n', cleaned_content)  
+        cleaned_content = _WS_RE.sub(' ', cleaned_content)
+        cleaned_content = _NL_RE.sub('\n\n', cleaned_content)
         cleaned_content = cleaned_content.strip()
         
         return cleaned_content, shapes_files
@@ -468,50 +696,40 @@ class ResponseProcessor:
         if len(content) <= max_length:
             return [content]
         
-        chunks = []
-        current_chunk = ""
+        chunks: List[str] = []
+        buf: List[str] = []
+        buf_len = 0  # Length of ' '.join(buf)
         
-        # Split by sentences first
-        sentences = re.split(r'(?<=[.!?])\s+', content)
+        def add(piece: str):
+            nonlocal buf, buf_len
+            if buf and buf_len + 1 + len(piece) > max_length:
+                chunks.append(' '.join(buf))
+                buf, buf_len = [], 0
+            buf.append(piece)
+            buf_len += len(piece) + (1 if buf_len else 0)
         
-        for sentence in sentences:
-            # If a single sentence is too long, split by words
-            if len(sentence) > max_length:
-                words = sentence.split()
-                temp_sentence = ""
-                
-                for word in words:
-                    if len(temp_sentence + " " + word) > max_length:
-                        if temp_sentence:
-                            if current_chunk:
-                                if len(current_chunk + " " + temp_sentence) <= max_length:
-                                    current_chunk += " " + temp_sentence
-                                else:
-                                    chunks.append(current_chunk.strip())
-                                    current_chunk = temp_sentence
-                            else:
-                                current_chunk = temp_sentence
-                            
-                            temp_sentence = word
-                        else:
-                            # Single word is too long, force split
-                            chunks.append(word[:max_length])
-                            temp_sentence = word[max_length:]
-                    else:
-                        temp_sentence += " " + word if temp_sentence else word
-                
-                if temp_sentence:
-                    sentence = temp_sentence
+        # Walk sentence spans between separators without building a sentence list
+        start = 0
+        for match in itertools.chain(_SENTENCE_RE.finditer(content), (None,)):
+            end = match.start() if match else len(content)
+            sentence = content[start:end].strip()
+            if match:
+                start = match.end()
+            if not sentence:
+                continue
             
-            # Add sentence to current chunk
-            if len(current_chunk + " " + sentence) <= max_length:
-                current_chunk += " " + sentence if current_chunk else sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
+            if len(sentence) <= max_length:
+                add(sentence)
+                continue
+            
+            # A single sentence is too long, split by words and force split overlong words
+            for word in sentence.split():
+                while len(word) > max_length:
+                    add(word[:max_length])
+                    word = word[max_length:]
+                add(word)
         
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if buf:
+            chunks.append(' '.join(buf))
         
-        return [chunk for chunk in chunks if chunk.strip()]
+        return chunks
@@ -1,24 +1,37 @@
 import time
 import asyncio
+import itertools
 import logging
-from typing import Dict, List, Tuple
-from collections import defaultdict, deque
+from random import uniform as _uniform
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+# Seconds of typing per character: ~200 characters per minute
+_TYPING_FACTOR = 60 / 200
+
+# Bounds in seconds for pacing bot-to-bot conversations
+_BOT_DELAY_MIN = 10
+_BOT_DELAY_MAX = 30
+
 class RateLimiter:
     """Handles rate limiting for bot interactions"""
     
-    def __init__(self):
-        self.bot_interactions: Dict[int, deque] = defaultdict(deque)  # channel_id -> timestamps
-        
+    def __init__(self, bot_delay_min: float = _BOT_DELAY_MIN, bot_delay_max: float = _BOT_DELAY_MAX):
         # API rate limit tracking
-        self.api_rate_limits: Dict[str, Tuple[float, int]] = {}  # key -> (reset_time, remaining)
+        self.api_rate_limits: Dict[str, Tuple[float, int]] = {}  # key -> (monotonic reset_time, remaining)
         
         # Delay tracking for bot conversations
-        self.last_bot_response: Dict[int, float] = {}  # channel_id -> timestamp
-        self.bot_delay_min = 10  # minimum delay in seconds
-        self.bot_delay_max = 30  # maximum delay in seconds
+        self.bot_response_allowed_at: Dict[int, float] = {}  # channel_id -> earliest next response time
+        self.bot_delay_min = bot_delay_min  # minimum delay in seconds
+        self.bot_delay_max = bot_delay_max  # maximum delay in seconds
+        
+        # Channels grouped by the time window of their last bot response, so stale
+        # channels can be dropped one old bucket at a time
+        self.expiry_window = 300  # seconds per bucket
+        self._expiry_buckets: Dict[int, Set[int]] = defaultdict(set)  # bucket -> channel_ids
+        self._current_bucket: Optional[int] = None
     
     def can_respond_to_bot(self, channel_id: int) -> Tuple[bool, float]:
         """
@@ -30,80 +43,100 @@ class RateLimiter:
         Returns:
             Tuple of (can_respond, delay_seconds)
         """
-        current_time = time.time()
+        # Channels without recent bot responses need no clock read
+        allowed_at = self.bot_response_allowed_at.get(channel_id)
+        if allowed_at is None:
+            return True, 0
         
         # Check minimum delay since last response (keep this for natural pacing)
-        if channel_id in self.last_bot_response:
-            time_since_last = current_time - self.last_bot_response[channel_id]
-            if time_since_last < self.bot_delay_min:
-                wait_time = self.bot_delay_min - time_since_last
-                return False, wait_time
+        current_time = time.monotonic()
+        if allowed_at > current_time:
+            return False, allowed_at - current_time
         
+        # Deadline passed; forget it now instead of waiting for the bucket sweep
+        del self.bot_response_allowed_at[channel_id]
         return True, 0
     
     def record_bot_response(self, channel_id: int):
         """Record that the bot responded to another bot"""
-        current_time = time.time()
-        self.last_bot_response[channel_id] = current_time
+        current_time = time.monotonic()
+        
+        # Store the deadline rather than the timestamp so checks need one subtraction
+        self.bot_response_allowed_at[channel_id] = current_time + self.bot_delay_min
+        
+        bucket = int(current_time // self.expiry_window)
+        self._expiry_buckets[bucket].add(channel_id)
+        if bucket != self._current_bucket:
+            self._current_bucket = bucket
+            self._cleanup_old_entries(current_time)
     
-    def _cleanup_old_entries(self, channel_id: int, current_time: float):
-        """Remove entries older than the time window"""
-        pass
+    def _cleanup_old_entries(self, current_time: float):
+        """Forget channels with no bot response in the last full expiry window"""
+        for bucket in [b for b in self._expiry_buckets if b < self._current_bucket - 1]:
+            for channel_id in self._expiry_buckets.pop(bucket):
+                # Channels that responded again since are also in a newer bucket and not yet expired
+                allowed_at = self.bot_response_allowed_at.get(channel_id)
+                if allowed_at is not None and allowed_at <= current_time:
+                    del self.bot_response_allowed_at[channel_id]
     
     def set_api_rate_limit(self, key: str, reset_time: float, remaining: int):
-        """Set API rate limit information"""
-        self.api_rate_limits[key] = (reset_time, remaining)
+        """Set API rate limit information from an absolute (epoch) reset time"""
+        # Convert once so later checks use the monotonic clock and ignore wall-clock steps
+        reset_at = reset_time - time.time() + time.monotonic()
+        self.api_rate_limits[key] = (reset_at, remaining)
     
     def get_api_rate_limit_wait(self, key: str) -> float:
         """Get how long to wait for API rate limit to reset"""
-        if key not in self.api_rate_limits:
+        entry = self.api_rate_limits.get(key)
+        if entry is None or entry[1] > 0:
             return 0
         
-        reset_time, remaining = self.api_rate_limits[key]
-        if remaining > 0:
-            return 0
+        wait_time = entry[0] - time.monotonic()
+        if wait_time > 0:
+            return wait_time
         
-        current_time = time.time()
-        return max(0, reset_time - current_time)
+        # Reset time passed; drop the stale entry so later checks hit the fast path
+        del self.api_rate_limits[key]
+        return 0
     
     def is_api_rate_limited(self, key: str) -> bool:
         """Check if API is currently rate limited"""
-        return self.get_api_rate_limit_wait(key) > 0
+        entry = self.api_rate_limits.get(key)
+        return entry is not None and entry[1] <= 0 and entry[0] > time.monotonic()
 
 class DelayCalculator:
     """Calculates appropriate delays for bot responses"""
     
     @staticmethod
-    def get_bot_conversation_delay() -> float:
-        """Get random delay for bot-to-bot conversations (10-30 seconds)"""
-        import random
-        return random.uniform(10, 30)
+    def get_bot_conversation_delay(delay_min: float = _BOT_DELAY_MIN, delay_max: float = _BOT_DELAY_MAX) -> float:
+        """Get random delay for bot-to-bot conversations (10-30 seconds by default)"""
+        return _uniform(delay_min, delay_max)
     
     @staticmethod
     def get_typing_delay(message_length: int) -> float:
         """Calculate typing indicator delay based on message length"""
-        # Simulate human typing speed: ~200 characters per minute
-        base_delay = message_length / 200 * 60  # Convert to seconds
-        
-        # Add some randomness and ensure minimum/maximum delays
-        import random
-        randomized_delay = base_delay * random.uniform(0.8, 1.2)
+        # Simulate human typing speed with some randomness
+        delay = message_length * _TYPING_FACTOR * _uniform(0.8, 1.2)
         
         # Clamp between 1 and 8 seconds
-        return max(1, min(8, randomized_delay))
+        return 1.0 if delay < 1.0 else (8.0 if delay > 8.0 else delay)
 
 class ResponseScheduler:
     """Schedules bot responses with appropriate delays"""
     
     def __init__(self, rate_limiter: RateLimiter):
         self.rate_limiter = rate_limiter
-        self.pending_tasks: Dict[str, asyncio.Task] = {}  # "channel_id:user_id" -> task
-        self.latest_bot_message: Dict[str, int] = {}  # "channel_id:user_id" -> message_id
+        self.latest_gen: Dict[Tuple[int, int], int] = {}  # (channel_id, user_id) -> generation of newest scheduled response
+        self._generations = itertools.count(1)  # Unique across keys so stale generations never repeat
     
     async def schedule_response(self, message, response_func, is_bot_conversation: bool = False):
         """
         Schedule a response with appropriate delay
         
+        A newer message for the same key supersedes this one: instead of
+        cancelling a task, the older response sees the newer generation and
+        skips sending.
+        
         Args:
             message: Discord message object
             response_func: Async function to call for the response
@@ -113,71 +146,62 @@ class ResponseScheduler:
         user_id = message.author.id
         message_id = message.id
         
-        # Create unique key for this bot in this channel
-        bot_key = f"{channel_id}:{user_id}"
+        if is_bot_conversation:
+            # Create unique key for this bot in this channel
+            bot_key = (channel_id, user_id)
+        else:
+            # For human conversations, one key per channel (user ID 0 never belongs to a real user)
+            bot_key = (channel_id, 0)
+        
+        gen = next(self._generations)
+        self.latest_gen[bot_key] = gen
         
         if is_bot_conversation:
-            # Update latest bot message for this specific bot in this channel
-            self.latest_bot_message[bot_key] = message_id
-            
-            # Cancel any pending response for this specific bot
-            if bot_key in self.pending_tasks:
-                self.pending_tasks[bot_key].cancel()
-                logger.debug(f"Cancelled previous response task for bot {user_id} in channel {channel_id}")
-            
             # Check if can respond (now only checks minimum delay, not response limit)
             can_respond, wait_time = self.rate_limiter.can_respond_to_bot(channel_id)
             if not can_respond:
                 logger.info(f"Bot conversation delayed in channel {channel_id}, wait time: {wait_time:.1f}s")
                 await asyncio.sleep(wait_time)
             
-            delay = DelayCalculator.get_bot_conversation_delay()
+            delay = DelayCalculator.get_bot_conversation_delay(
+                self.rate_limiter.bot_delay_min, self.rate_limiter.bot_delay_max
+            )
         else:
-            # For human conversations, use channel-only key for backwards compatibility
-            human_key = str(channel_id)
-            if human_key in self.pending_tasks:
-                self.pending_tasks[human_key].cancel()
             delay = 0
-            bot_key = human_key
-        
-        # Checks if message is still latest for this bot
-        async def validated_response():
-            # For bot conversations, check if this message is still the latest from this bot
-            if is_bot_conversation:
-                current_latest = self.latest_bot_message.get(f"{channel_id}:{user_id}")
-                if current_latest != message_id:
-                    logger.debug(f"Skipping response to outdated message {message_id} from bot {user_id} in channel {channel_id} (latest: {current_latest})")
-                    return
-            
-            await response_func()
         
-        # Schedule the response
-        task = asyncio.create_task(self._delayed_response(message, validated_response, delay, is_bot_conversation))
-        self.pending_tasks[bot_key] = task
+        # Checks if message is still latest for this key; consulted after every wait
+        def is_current() -> bool:
+            if self.latest_gen.get(bot_key) == gen:
+                return True
+            logger.debug(f"Skipping response to outdated message {message_id} from {user_id} in channel {channel_id}")
+            return False
         
         try:
-            await task
-        except asyncio.CancelledError:
-            logger.debug(f"Response cancelled for {bot_key}")
+            if is_current():
+                await self._delayed_response(message, response_func, delay, is_bot_conversation, is_current)
         finally:
-            if bot_key in self.pending_tasks and self.pending_tasks[bot_key] == task:
-                del self.pending_tasks[bot_key]
+            if self.latest_gen.get(bot_key) == gen:
+                del self.latest_gen[bot_key]
     
-    async def _delayed_response(self, message, response_func, delay: float, is_bot_conversation: bool):
-        """Execute delayed response"""
+    async def _delayed_response(self, message, response_func, delay: float, is_bot_conversation: bool,
+                                is_current: Callable[[], bool]):
+        """Execute delayed response, stopping early once a newer message supersedes it"""
         if delay > 0:
             # logger.info(f"Delaying response by {delay:.1f} seconds")
             await asyncio.sleep(delay)
+            if not is_current():
+                return
         
         # Show typing indicator for a realistic duration
         async with message.channel.typing():
             # Calculate typing delay (simulate human typing)
             typing_delay = DelayCalculator.get_typing_delay(100)  # Assume ~100 char response
             await asyncio.sleep(typing_delay)
+            if not is_current():
+                return
             
-            # Execute the response (already validated in schedule_response)
             await response_func()
-            
-            # Record bot interaction if it's a bot conversation
-            if is_bot_conversation:
-                self.rate_limiter.record_bot_response(message.channel.id)
+        
+        # Record bot interaction if it's a bot conversation
+        if is_bot_conversation:
+            self.rate_limiter.record_bot_response(message.channel.id)
@@ -1,10 +1,17 @@
 import discord
 import logging
-from typing import List, Optional
+import time
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Permission denial messages; the placeholder is the command name
+_ERR_WITH_OWNER = ("❌ You need to be the bot owner, server owner, have Administrator/Manage Server "
+                   "permissions, or have a role with permission to use `/{}`.")
+_ERR_NO_OWNER = ("❌ You need to be the server owner, have Administrator/Manage Server "
+                 "permissions, or have a role with permission to use `/{}`.")
+
 class PermissionLevel(Enum):
     """Permission levels for commands"""
     EVERYONE = 0
@@ -16,15 +23,53 @@ class PermissionLevel(Enum):
 class PermissionManager:
     """Manages permissions for bot commands"""
     
+    # Seconds a guild's command role settings are reused before re-reading storage
+    SETTINGS_CACHE_TTL = 30
+    
     def __init__(self, bot, storage):
         self.bot = bot
         self.storage = storage
+        # guild_id -> (expires_at, storage settings_version, command_roles); the version check makes
+        # role changes made through another cog's manager visible immediately
+        self._command_roles_cache: Dict[int, Tuple[float, int, Dict[str, FrozenSet[int]]]] = {}
+        self.refresh_owner()
+        
+        # Permission level -> check; EVERYONE is answered before dispatch
+        self._handlers = {
+            PermissionLevel.BOT_OWNER: self._check_bot_owner,
+            PermissionLevel.SERVER_OWNER: self._check_guild_privileges,
+            PermissionLevel.ADMIN: self._check_guild_privileges,
+            PermissionLevel.SELECTED_ROLES: self._check_guild_privileges,
+        }
+    
+    def refresh_owner(self):
+        """Re-read the bot owner ID; call after changing bot.bot_owner_id at runtime"""
+        self._bot_owner_id: Optional[int] = getattr(self.bot, 'bot_owner_id', None)
+    
+    async def _get_command_roles_map(self, guild_id: int) -> Dict[str, FrozenSet[int]]:
+        """Get a guild's command -> role ID set mapping, cached for SETTINGS_CACHE_TTL seconds"""
+        now = time.monotonic()
+        version = self.storage.settings_version
+        cached = self._command_roles_cache.get(guild_id)
+        if cached is not None and cached[0] > now and cached[1] == version:
+            return cached[2]
+        
+        settings = await self.storage.read_server_settings(guild_id)
+        # Converted to sets once per load so every membership check is O(1)
+        command_roles = {
+            command: frozenset(role_ids)
+            for command, role_ids in settings.get("command_roles", {}).items()
+        }
+        self._command_roles_cache[guild_id] = (now + self.SETTINGS_CACHE_TTL, version, command_roles)
+        return command_roles
+    
+    def _invalidate_command_roles(self, guild_id: int):
+        """Drop a guild's cached command roles after they change"""
+        self._command_roles_cache.pop(guild_id, None)
     
     def is_bot_owner(self, user_id: int) -> bool:
         """Check if user is the bot owner"""
-        return (hasattr(self.bot, 'bot_owner_id') and 
-                self.bot.bot_owner_id is not None and 
-                user_id == self.bot.bot_owner_id)
+        return self._bot_owner_id is not None and user_id == self._bot_owner_id
     
     def is_server_owner(self, user: discord.Member) -> bool:
         """Check if user is the server owner"""
@@ -37,14 +82,12 @@ class PermissionManager:
     async def has_selected_role_permissions(self, user: discord.Member, command_name: str) -> bool:
         """Check if user has any of the selected roles for the command"""
         try:
-            settings = await self.storage.get_server_settings(user.guild.id)
-            command_roles = settings.get("command_roles", {}).get(command_name, [])
+            command_roles = (await self._get_command_roles_map(user.guild.id)).get(command_name)
             
             if not command_roles:
                 return False
             
-            user_role_ids = [role.id for role in user.roles]
-            return any(role_id in user_role_ids for role_id in command_roles)
+            return not command_roles.isdisjoint(role.id for role in user.roles)
         except Exception as e:
             logger.error(f"Error checking selected role permissions: {e}")
             return False
@@ -55,83 +98,60 @@ class PermissionManager:
         Check if user has permission to use a command
         Returns: (has_permission: bool, error_message: str)
         """
-        try:
-            # Bot owner has access to everything
-            if self.is_bot_owner(user.id):
-                return True, ""
-            
-            # Check based on required permission level
-            if required_level == PermissionLevel.EVERYONE:
-                return True, ""
-            
-            elif required_level == PermissionLevel.BOT_OWNER:
-                if not hasattr(self.bot, 'bot_owner_id') or self.bot.bot_owner_id is None:
-                    # No bot owner set, fall back to server owner
-                    if self.is_server_owner(user):
-                        return True, ""
-                    return False, "❌ You need to be the server owner to use this command."
-                else:
-                    return False, "❌ You need to be the bot owner to use this command."
-            
-            elif required_level == PermissionLevel.SERVER_OWNER:
-                if self.is_server_owner(user):
-                    return True, ""
-                elif self.has_admin_permissions(user):
-                    return True, ""
-                elif await self.has_selected_role_permissions(user, command_name):
-                    return True, ""
-                else:
-                    return False, self._get_permission_error_message(command_name)
-            
-            elif required_level == PermissionLevel.ADMIN:
-                if self.is_server_owner(user):
-                    return True, ""
-                elif self.has_admin_permissions(user):
-                    return True, ""
-                elif await self.has_selected_role_permissions(user, command_name):
-                    return True, ""
-                else:
-                    return False, self._get_permission_error_message(command_name)
-            
-            elif required_level == PermissionLevel.SELECTED_ROLES:
-                if self.is_server_owner(user):
-                    return True, ""
-                elif self.has_admin_permissions(user):
-                    return True, ""
-                elif await self.has_selected_role_permissions(user, command_name):
-                    return True, ""
-                else:
-                    return False, self._get_permission_error_message(command_name)
-            
+        # Fast paths that cannot raise: open commands and the bot owner
+        if required_level is PermissionLevel.EVERYONE:
+            return True, ""
+        
+        # Bot owner has access to everything
+        if self._bot_owner_id is not None and user.id == self._bot_owner_id:
+            return True, ""
+        
+        handler = self._handlers.get(required_level)
+        if handler is None:
             return False, "❌ Permission check failed."
-            
+        
+        try:
+            return await handler(user, command_name)
         except Exception as e:
             logger.error(f"Error checking permissions for {command_name}: {e}")
             return False, "❌ An error occurred while checking permissions."
     
+    async def _check_bot_owner(self, user: discord.Member, command_name: str) -> Tuple[bool, str]:
+        """Permission handler for BOT_OWNER commands; the owner was already let through"""
+        if self._bot_owner_id is None:
+            # No bot owner set, fall back to server owner
+            if self.is_server_owner(user):
+                return True, ""
+            return False, "❌ You need to be the server owner to use this command."
+        return False, "❌ You need to be the bot owner to use this command."
+    
+    async def _check_guild_privileges(self, user: discord.Member, command_name: str) -> Tuple[bool, str]:
+        """Permission handler for SERVER_OWNER, ADMIN and SELECTED_ROLES commands"""
+        # Cheap member checks first; only fall back to stored role settings if both fail
+        if self.is_server_owner(user) or self.has_admin_permissions(user):
+            return True, ""
+        if await self.has_selected_role_permissions(user, command_name):
+            return True, ""
+        return False, self._get_permission_error_message(command_name)
+    
     def _get_permission_error_message(self, command_name: str) -> str:
         """Get appropriate error message for permission denial"""
-        if hasattr(self.bot, 'bot_owner_id') and self.bot.bot_owner_id is not None:
-            return (f"❌ You need to be the bot owner, server owner, have Administrator/Manage Server "
-                   f"permissions, or have a role with permission to use `/{command_name}`.")
-        else:
-            return (f"❌ You need to be the server owner, have Administrator/Manage Server "
-                   f"permissions, or have a role with permission to use `/{command_name}`.")
+        template = _ERR_WITH_OWNER if self._bot_owner_id is not None else _ERR_NO_OWNER
+        return template.format(command_name)
     
     async def add_command_role(self, guild_id: int, command_name: str, role_id: int):
         """Add a role to command permissions"""
         try:
             settings = await self.storage.get_server_settings(guild_id)
-            if "command_roles" not in settings:
-                settings["command_roles"] = {}
-            if command_name not in settings["command_roles"]:
-                settings["command_roles"][command_name] = []
+            roles = settings.setdefault("command_roles", {}).setdefault(command_name, [])
             
-            if role_id not in settings["command_roles"][command_name]:
-                settings["command_roles"][command_name].append(role_id)
-                await self.storage.update_server_settings(guild_id, settings)
-                return True
-            return False
+            if role_id in roles:
+                return False
+            
+            roles.append(role_id)
+            await self.storage.update_server_settings(guild_id, settings)
+            self._invalidate_command_roles(guild_id)
+            return True
         except Exception as e:
             logger.error(f"Error adding command role: {e}")
             return False
@@ -140,13 +160,14 @@ class PermissionManager:
         """Remove a role from command permissions"""
         try:
             settings = await self.storage.get_server_settings(guild_id)
-            command_roles = settings.get("command_roles", {}).get(command_name, [])
-            
-            if role_id in command_roles:
+            try:
                 settings["command_roles"][command_name].remove(role_id)
-                await self.storage.update_server_settings(guild_id, settings)
-                return True
-            return False
+            except (KeyError, ValueError):
+                return False
+            
+            await self.storage.update_server_settings(guild_id, settings)
+            self._invalidate_command_roles(guild_id)
+            return True
         except Exception as e:
             logger.error(f"Error removing command role: {e}")
             return False
@@ -154,8 +175,7 @@ class PermissionManager:
     async def get_command_roles(self, guild_id: int, command_name: str) -> List[int]:
         """Get roles that have permission for a command"""
         try:
-            settings = await self.storage.get_server_settings(guild_id)
-            return settings.get("command_roles", {}).get(command_name, [])
+            return sorted((await self._get_command_roles_map(guild_id)).get(command_name, ()))
         except Exception as e:
             logger.error(f"Error getting command roles: {e}")
             return []
\ No newline at end of file
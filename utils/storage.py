@@ -1,337 +1,572 @@
 import json
 import os
-import aiofiles
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import AbstractSet, Dict, Any, Callable, Mapping, NamedTuple, Optional, Set
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Server settings fields held as sets in memory and saved as sorted lists
+_SET_FIELDS = ("blacklist", "whitelist", "server_trigger_words", "blocked_users")
+# Per-channel flag maps, keyed by int channel ID in memory and by string on disk
+_CHANNEL_MAP_FIELDS = ("activated_channels", "bot_to_bot_channels")
+
+def _json_default(obj: Any) -> Any:
+    """Serialize in-memory sets as sorted JSON lists"""
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps(data: Any, pretty: bool = False) -> bytes:
+    """Serialize data to compact (or indented) JSON bytes, using orjson when installed; int keys are written as strings"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_json_default, option=option)
+    if pretty:
+        return json.dumps(data, default=_json_default, indent=2).encode('utf-8')
+    return json.dumps(data, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+def _loads(content: bytes) -> Any:
+    """Parse JSON bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+# Shared read-only defaults handed to readers of unconfigured guilds
+_DEFAULT_SERVER_SETTINGS: Mapping[str, Any] = MappingProxyType({
+    "activated": False,
+    "blacklist": frozenset(),
+    "whitelist": frozenset(),
+    "use_blacklist": False  # True for blacklist, False for whitelist
+})
+
+_EMPTY: Mapping[Any, Any] = MappingProxyType({})
+
+_DEFAULT_WELCOME_SETTINGS: Mapping[str, Any] = MappingProxyType({
+    'enabled': False,
+    'channel_id': None
+})
+
+_DEFAULT_REVIVE_CHAT_SETTINGS: Mapping[str, Any] = MappingProxyType({
+    'enabled': False,
+    'channel_id': None,
+    'role_id': None,
+    'interval_minutes': 60,
+    'next_send_time': None
+})
+
+def _normalize_trigger_word(word: str) -> str:
+    """Canonical stored form of a trigger word; casefold also folds Unicode case variants like 'ß'"""
+    return word.strip().casefold()
+
+def _rekey_ints(mapping: Dict[Any, Any], source: str):
+    """Re-key a loaded ID map by int in place; keys that are not numeric are kept as they are"""
+    for key in list(mapping):
+        try:
+            int_key = int(key)
+        except ValueError:
+            logger.warning(f"Keeping non-numeric key {key!r} in {source}")
+            continue
+        mapping[int_key] = mapping.pop(key)
+
+def _replace_file(filepath: Path, tmp_path: Path, blob: bytes):
+    """Write blob to tmp_path and rename it over filepath, so a crash never leaves a partial file"""
+    with open(tmp_path, "wb") as f:
+        f.write(blob)
+        f.flush()
+        # Make the data durable before the rename, or a power loss can leave an empty file behind it
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+def _default_server_settings() -> Dict[str, Any]:
+    """Fresh mutable settings for a guild that has none stored yet"""
+    return {
+        key: set(value) if isinstance(value, frozenset) else value
+        for key, value in _DEFAULT_SERVER_SETTINGS.items()
+    }
+
+class GuildView(NamedTuple):
+    """Read-only snapshot of the server settings checked on every message"""
+    use_blacklist: bool
+    blacklist: AbstractSet[int]
+    whitelist: AbstractSet[int]
+    activated_channels: Mapping[int, bool]
+    bot_to_bot_channels: Mapping[int, bool]
+    trigger_words: AbstractSet[str]
+    blocked_users: AbstractSet[int]
+
 class DataStorage:
     """Handles JSON-based data storage for the bot"""
     
+    # Seconds to collect writes before saving dirty files
+    FLUSH_DELAY = 0.25
+    # Longest wait between retries while saves keep failing
+    FLUSH_MAX_DELAY = 30.0
+    
     def __init__(self, data_dir: str = "data"):
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(exist_ok=True)
+        # Files themselves are created by the first save that needs them
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        # Files are saved compact; set BOT_JSON_PRETTY=1 to indent them for hand inspection
+        self.pretty_json = os.getenv('BOT_JSON_PRETTY') == '1'
         
         # File paths
         self.server_settings_file = self.data_dir / "server_settings.json"
         self.user_auth_file = self.data_dir / "user_auth.json"
-        self.blocked_users_file = self.data_dir / "blocked_users.json"
+        # Blocked users now live in server settings; the old file is merged in once on load
+        self.legacy_blocked_users_file = self.data_dir / "blocked_users.json"
         
-        # Initialize files if they don't exist
-        self._init_files()
-    
-    def _init_files(self):
-        """Initialize data files with default structures"""
-        default_data = {
-            "server_settings.json": {},
-            "user_auth.json": {},
-            "blocked_users.json": {},
-        }
+        # Parsed file contents, kept in sync by _write_json so reads skip the disk
+        self._cache: Dict[Path, Dict[int, Any]] = {}
+        self._cache_locks: Dict[Path, asyncio.Lock] = {}
+        # Files whose last load failed; never saved, so the unread contents aren't overwritten
+        self._load_failed: Set[Path] = set()
+        self._guild_views: Dict[int, GuildView] = {}  # Rebuilt after any server settings write
+        # Bumped whenever server settings change, so other caches derived from them can revalidate
+        self.settings_version = 0
+        # Held across each read-modify-write so concurrent mutators never work from a stale load
+        self._mutation_locks: Dict[Path, asyncio.Lock] = {}
         
-        for filename, default_content in default_data.items():
-            filepath = self.data_dir / filename
-            if not filepath.exists():
-                try:
-                    with open(filepath, 'w') as f:
-                        json.dump(default_content, f, indent=2)
-                except Exception as e:
-                    logger.error(f"Failed to initialize {filename}: {e}")
+        # Writes only mark files dirty; a background task saves them in batches
+        self._dirty: Set[Path] = set()
+        self._write_locks: Dict[Path, asyncio.Lock] = {}
+        self._flush_task: Optional[asyncio.Task] = None
     
-    async def _read_json(self, filepath: Path) -> Dict[str, Any]:
-        """Read JSON data from file"""
-        try:
-            if not filepath.exists():
+    async def _read_json(self, filepath: Path) -> Dict[int, Any]:
+        """Read JSON data from the cache, loading the file on first use"""
+        data = self._read_cached(filepath)
+        if data is None:
+            data = await self._ensure_loaded(filepath)
+        return data
+    
+    async def warm(self):
+        """Load every storage file into the cache concurrently, before the first event needs them"""
+        await asyncio.gather(
+            self._ensure_loaded(self.server_settings_file),
+            self._ensure_loaded(self.user_auth_file)
+        )
+    
+    def _read_cached(self, filepath: Path) -> Optional[Dict[int, Any]]:
+        """Get a file's cached data without locking; None until it has been loaded"""
+        return self._cache.get(filepath)
+    
+    async def _ensure_loaded(self, filepath: Path) -> Dict[int, Any]:
+        """Load a file into the cache, letting concurrent first readers share one load"""
+        lock = self._cache_locks.setdefault(filepath, asyncio.Lock())
+        async with lock:
+            # Another reader may have loaded it while we waited
+            data = self._cache.get(filepath)
+            if data is not None:
+                return data
+            
+            try:
+                loop = asyncio.get_running_loop()
+                content = await loop.run_in_executor(None, filepath.read_bytes)
+                data = _loads(content) if content.strip() else {}
+                self._normalize(filepath, data)
+            except FileNotFoundError:
+                # Never saved yet; the first write creates it
+                data = {}
+            except (OSError, ValueError) as e:
+                # Not cached, so the next read retries the file
+                logger.error(f"Error reading {filepath}: {e}")
+                self._load_failed.add(filepath)
                 return {}
+            self._load_failed.discard(filepath)
             
-            async with aiofiles.open(filepath, 'r') as f:
-                content = await f.read()
-                return json.loads(content) if content.strip() else {}
-        except Exception as e:
-            logger.error(f"Error reading {filepath}: {e}")
-            return {}
+            migrated = (
+                filepath == self.server_settings_file
+                and self.legacy_blocked_users_file.exists()
+                and await self._merge_legacy_blocked_users(data)
+            )
+            # Published only once the merge is done, so no reader or GuildView sees partial data
+            self._cache[filepath] = data
+            if filepath == self.server_settings_file:
+                # Views built from an earlier failed load must not outlive it
+                self._settings_changed()
+            if migrated:
+                await self._remove_legacy_blocked_users()
+            return data
     
-    async def _write_json(self, filepath: Path, data: Dict[str, Any]):
-        """Write JSON data to file"""
+    async def _merge_legacy_blocked_users(self, data: Dict[int, Any]) -> bool:
+        """Merge blocked_users.json into not-yet-cached server settings; True if merged"""
+        legacy_file = self.legacy_blocked_users_file
         try:
-            async with aiofiles.open(filepath, 'w') as f:
-                await f.write(json.dumps(data, indent=2))
-        except Exception as e:
-            logger.error(f"Error writing {filepath}: {e}")
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(None, legacy_file.read_bytes)
+            legacy = _loads(content) if content.strip() else {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading {legacy_file}: {e}")
+            return False
+        
+        _rekey_ints(legacy, legacy_file.name)
+        for guild_id, user_ids in legacy.items():
+            if user_ids:
+                settings = data.setdefault(guild_id, _default_server_settings())
+                settings.setdefault("blocked_users", set()).update(user_ids)
+        return True
+    
+    async def _remove_legacy_blocked_users(self):
+        """Save the merged server settings, then delete blocked_users.json"""
+        legacy_file = self.legacy_blocked_users_file
+        self._dirty.add(self.server_settings_file)
+        if not await self._flush_file(self.server_settings_file):
+            # The old file is the only on-disk copy until the merged settings are saved
+            logger.warning(f"Keeping {legacy_file} until the merged settings are saved")
+            self._mark_dirty(self.server_settings_file)
+            return
+        
+        try:
+            legacy_file.unlink()
+            logger.info(f"Merged {legacy_file} into {self.server_settings_file}")
+        except OSError as e:
+            logger.error(f"Error removing {legacy_file}: {e}")
+    
+    def _normalize(self, filepath: Path, data: Dict[Any, Any]):
+        """Re-key loaded guild/user/channel maps by int and convert membership lists to sets for O(1) lookups"""
+        _rekey_ints(data, filepath.name)
+        if filepath == self.server_settings_file:
+            for settings in data.values():
+                for field in _SET_FIELDS:
+                    if field in settings:
+                        settings[field] = set(settings[field])
+                for field in _CHANNEL_MAP_FIELDS:
+                    if field in settings:
+                        _rekey_ints(settings[field], f"{filepath.name} {field}")
+                if "server_trigger_words" in settings:
+                    settings["server_trigger_words"] = {
+                        _normalize_trigger_word(word) for word in settings["server_trigger_words"]
+                    }
+    
+    def _mutation_lock(self, filepath: Path) -> asyncio.Lock:
+        """Get the lock serializing read-modify-write of one file"""
+        return self._mutation_locks.setdefault(filepath, asyncio.Lock())
+    
+    async def _write_json(self, filepath: Path, data: Dict[int, Any]):
+        """Write JSON data to the cache and schedule it to be saved"""
+        if filepath in self._load_failed:
+            logger.error(f"Not saving {filepath}: it failed to load and would be overwritten")
+            return
+        self._cache[filepath] = data
+        if filepath == self.server_settings_file:
+            self._settings_changed()
+        self._mark_dirty(filepath)
+    
+    def _settings_changed(self):
+        """Invalidate everything derived from server settings"""
+        self._guild_views.clear()
+        self.settings_version += 1
+    
+    def _mark_dirty(self, filepath: Path):
+        """Schedule a cached file to be saved by the flusher"""
+        if filepath in self._load_failed:
+            logger.error(f"Not saving {filepath}: it failed to load and would be overwritten")
+            return
+        self._dirty.add(filepath)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flusher())
+    
+    async def _flusher(self):
+        """Save dirty files every FLUSH_DELAY seconds until nothing is left to save"""
+        delay = self.FLUSH_DELAY
+        while self._dirty:
+            await asyncio.sleep(delay)
+            if await self.flush():
+                delay = self.FLUSH_DELAY
+            else:
+                # Failed saves stay dirty; back off so an unwritable disk doesn't spin the loop
+                delay = min(delay * 2, self.FLUSH_MAX_DELAY)
+    
+    async def _flush_file(self, filepath: Path) -> bool:
+        """Save one file's cached data to disk; False if it failed and is still dirty"""
+        if filepath in self._load_failed or filepath not in self._cache:
+            # Nothing trustworthy to save; writing would overwrite contents that were never read
+            self._dirty.discard(filepath)
+            return False
+        async with self._write_locks.setdefault(filepath, asyncio.Lock()):
+            # Cleared before serializing so writes made meanwhile are saved next round
+            self._dirty.discard(filepath)
+            tmp_path = filepath.with_suffix(filepath.suffix + ".tmp")
+            try:
+                # Serialized on the loop so the thread never sees the dict mid-mutation
+                blob = _dumps(self._cache[filepath], self.pretty_json)
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, _replace_file, filepath, tmp_path, blob)
+            except (OSError, TypeError, ValueError) as e:
+                # TypeError/ValueError: data that cannot be serialized
+                logger.error(f"Error writing {filepath}: {e}")
+                # Kept dirty so the flusher, or the shutdown flush, tries again
+                self._dirty.add(filepath)
+                return False
+            return True
+    
+    async def flush(self) -> bool:
+        """Save all pending changes to disk now; call before shutdown. False if any save failed"""
+        saved = True
+        for filepath in list(self._dirty):
+            if not await self._flush_file(filepath):
+                saved = False
+        return saved
     
     # Server Settings Methods
     async def get_server_settings(self, guild_id: int) -> Dict[str, Any]:
         """Get server settings"""
         data = await self._read_json(self.server_settings_file)
-        return data.get(str(guild_id), {
-            "activated": False,
-            "blacklist": [],
-            "whitelist": [],
-            "use_blacklist": False  # True for blacklist, False for whitelist
-        })
+        settings = data.get(guild_id)
+        if settings is None:
+            # Only unconfigured guilds pay for a fresh mutable copy of the defaults
+            settings = _default_server_settings()
+        return settings
+    
+    async def read_server_settings(self, guild_id: int) -> Mapping[str, Any]:
+        """Get server settings for reading only; unconfigured guilds share a frozen default"""
+        data = await self._read_json(self.server_settings_file)
+        return data.get(guild_id, _DEFAULT_SERVER_SETTINGS)
+    
+    async def guild_view(self, guild_id: int) -> GuildView:
+        """Get the cached per-message view of a guild's settings"""
+        view = self._guild_views.get(guild_id)
+        if view is None:
+            settings = await self.read_server_settings(guild_id)
+            view = GuildView(
+                use_blacklist=settings.get("use_blacklist", False),
+                blacklist=settings.get("blacklist", frozenset()),
+                whitelist=settings.get("whitelist", frozenset()),
+                activated_channels=settings.get("activated_channels", _EMPTY),
+                bot_to_bot_channels=settings.get("bot_to_bot_channels", _EMPTY),
+                trigger_words=settings.get("server_trigger_words", frozenset()),
+                blocked_users=settings.get("blocked_users", frozenset())
+            )
+            self._guild_views[guild_id] = view
+        return view
     
     async def update_server_settings(self, guild_id: int, settings: Dict[str, Any]):
         """Update server settings"""
-        data = await self._read_json(self.server_settings_file)
-        data[str(guild_id)] = settings
-        await self._write_json(self.server_settings_file, data)
+        async with self._mutation_lock(self.server_settings_file):
+            data = await self._read_json(self.server_settings_file)
+            data[guild_id] = settings
+            await self._write_json(self.server_settings_file, data)
+    
+    async def _mutate_server_settings(self, guild_id: int, mutate: Callable[[Dict[str, Any]], Optional[bool]]) -> bool:
+        """
+        Apply an in-place change to a guild's settings and persist it once
+        
+        Args:
+            guild_id: Guild whose settings to change
+            mutate: Called with the settings dict; returning False means nothing changed
+            
+        Returns:
+            True if the settings were changed and written
+        """
+        async with self._mutation_lock(self.server_settings_file):
+            data = await self._read_json(self.server_settings_file)
+            settings = data.get(guild_id)
+            if settings is None:
+                settings = _default_server_settings()
+            
+            if mutate(settings) is False:
+                return False
+            
+            data[guild_id] = settings
+            await self._write_json(self.server_settings_file, data)
+            return True
     
     async def set_server_activation(self, guild_id: int, activated: bool):
         """Set server activation status"""
-        settings = await self.get_server_settings(guild_id)
-        settings["activated"] = activated
-        await self.update_server_settings(guild_id, settings)
+        def mutate(settings):
+            settings["activated"] = activated
+        await self._mutate_server_settings(guild_id, mutate)
     
     async def add_to_blacklist(self, guild_id: int, channel_id: int):
         """Add channel to blacklist and switch to blacklist mode"""
-        settings = await self.get_server_settings(guild_id)
-        if channel_id not in settings["blacklist"]:
-            settings["blacklist"].append(channel_id)
-        
-        # Switch to blacklist mode and clear whitelist
-        settings["use_blacklist"] = True
-        settings["whitelist"] = []
-        await self.update_server_settings(guild_id, settings)
+        def mutate(settings):
+            settings["blacklist"].add(channel_id)
+            
+            # Switch to blacklist mode and clear whitelist
+            settings["use_blacklist"] = True
+            settings["whitelist"] = set()
+        await self._mutate_server_settings(guild_id, mutate)
 
     async def remove_from_blacklist(self, guild_id: int, channel_id: int):
         """Remove channel from blacklist"""
-        settings = await self.get_server_settings(guild_id)
-        if channel_id in settings["blacklist"]:
-            settings["blacklist"].remove(channel_id)
-            await self.update_server_settings(guild_id, settings)
+        def mutate(settings):
+            if channel_id not in settings["blacklist"]:
+                return False
+            settings["blacklist"].discard(channel_id)
+        await self._mutate_server_settings(guild_id, mutate)
 
     async def add_to_whitelist(self, guild_id: int, channel_id: int):
         """Add channel to whitelist and switch to whitelist mode"""
-        settings = await self.get_server_settings(guild_id)
-        if channel_id not in settings["whitelist"]:
-            settings["whitelist"].append(channel_id)
-        
-        # Switch to whitelist mode and clear blacklist
-        settings["use_blacklist"] = False
-        settings["blacklist"] = []
-        await self.update_server_settings(guild_id, settings)
+        def mutate(settings):
+            settings["whitelist"].add(channel_id)
+            
+            # Switch to whitelist mode and clear blacklist
+            settings["use_blacklist"] = False
+            settings["blacklist"] = set()
+        await self._mutate_server_settings(guild_id, mutate)
 
     async def remove_from_whitelist(self, guild_id: int, channel_id: int):
         """Remove channel from whitelist"""
-        settings = await self.get_server_settings(guild_id)
-        if channel_id in settings["whitelist"]:
-            settings["whitelist"].remove(channel_id)
-            await self.update_server_settings(guild_id, settings)
+        def mutate(settings):
+            if channel_id not in settings["whitelist"]:
+                return False
+            settings["whitelist"].discard(channel_id)
+        await self._mutate_server_settings(guild_id, mutate)
     
     # User Auth Methods
     async def get_user_auth(self, user_id: int) -> Optional[Dict[str, str]]:
         """Get user authentication data (app_id and auth_token)"""
         data = await self._read_json(self.user_auth_file)
-        return data.get(str(user_id))
+        return data.get(user_id)
     
     async def set_user_auth(self, user_id: int, auth_data: Dict[str, str]):
         """Set user authentication data"""
-        data = await self._read_json(self.user_auth_file)
-        data[str(user_id)] = auth_data
-        await self._write_json(self.user_auth_file, data)
+        async with self._mutation_lock(self.user_auth_file):
+            data = await self._read_json(self.user_auth_file)
+            data[user_id] = auth_data
+            await self._write_json(self.user_auth_file, data)
     
     async def remove_user_auth(self, user_id: int) -> bool:
         """Remove user authentication data"""
-        data = await self._read_json(self.user_auth_file)
-        if str(user_id) in data:
-            del data[str(user_id)]
-            await self._write_json(self.user_auth_file, data)
-            return True
-        return False
+        async with self._mutation_lock(self.user_auth_file):
+            data = await self._read_json(self.user_auth_file)
+            if user_id in data:
+                del data[user_id]
+                await self._write_json(self.user_auth_file, data)
+                return True
+            return False
     
     # Blocked Users Methods
-    async def get_blocked_users(self, guild_id: int) -> List[int]:
-        """Get list of blocked users for a guild"""
-        data = await self._read_json(self.blocked_users_file)
-        return data.get(str(guild_id), [])
+    async def get_blocked_users(self, guild_id: int) -> AbstractSet[int]:
+        """Get the set of blocked users for a guild"""
+        return (await self.guild_view(guild_id)).blocked_users
     
     async def block_user(self, guild_id: int, user_id: int):
         """Block a user in a guild"""
-        data = await self._read_json(self.blocked_users_file)
-        if str(guild_id) not in data:
-            data[str(guild_id)] = []
-        
-        if user_id not in data[str(guild_id)]:
-            data[str(guild_id)].append(user_id)
-            await self._write_json(self.blocked_users_file, data)
+        def mutate(settings):
+            blocked = settings.setdefault("blocked_users", set())
+            if user_id in blocked:
+                return False
+            blocked.add(user_id)
+        await self._mutate_server_settings(guild_id, mutate)
     
     async def unblock_user(self, guild_id: int, user_id: int):
         """Unblock a user in a guild"""
-        data = await self._read_json(self.blocked_users_file)
-        if str(guild_id) in data and user_id in data[str(guild_id)]:
-            data[str(guild_id)].remove(user_id)
-            await self._write_json(self.blocked_users_file, data)
+        def mutate(settings):
+            blocked = settings.get("blocked_users")
+            if not blocked or user_id not in blocked:
+                return False
+            blocked.discard(user_id)
+        await self._mutate_server_settings(guild_id, mutate)
     
     async def is_user_blocked(self, guild_id: int, user_id: int) -> bool:
         """Check if a user is blocked in a guild"""
-        blocked_users = await self.get_blocked_users(guild_id)
-        return user_id in blocked_users
+        return user_id in (await self.guild_view(guild_id)).blocked_users
     
     # Trigger Words Methods
-    async def get_server_trigger_words(self, guild_id: int) -> List[str]:
+    async def get_server_trigger_words(self, guild_id: int) -> AbstractSet[str]:
         """Get server-specific trigger words"""
-        try:
-            settings = await self.get_server_settings(guild_id)
-            return settings.get("server_trigger_words", [])
-        except Exception as e:
-            logger.error(f"Error getting server trigger words: {e}")
-            return []
+        return (await self.guild_view(guild_id)).trigger_words
 
     async def add_server_trigger_word(self, guild_id: int, word: str) -> bool:
         """Add a server-specific trigger word"""
-        try:
-            settings = await self.get_server_settings(guild_id)
-            if "server_trigger_words" not in settings:
-                settings["server_trigger_words"] = []
-            
-            word = word.strip().lower()
-            if word and word not in settings["server_trigger_words"]:
-                settings["server_trigger_words"].append(word)
-                await self.update_server_settings(guild_id, settings)
-                return True
-            return False
-        except Exception as e:
-            logger.error(f"Error adding server trigger word: {e}")
+        word = _normalize_trigger_word(word)
+        if not word:
             return False
+        
+        def mutate(settings):
+            words = settings.setdefault("server_trigger_words", set())
+            if word in words:
+                return False
+            words.add(word)
+        return await self._mutate_server_settings(guild_id, mutate)
 
     async def remove_server_trigger_word(self, guild_id: int, word: str) -> bool:
         """Remove a server-specific trigger word"""
-        try:
-            settings = await self.get_server_settings(guild_id)
-            server_trigger_words = settings.get("server_trigger_words", [])
-            
-            word = word.strip().lower()
-            if word in server_trigger_words:
-                settings["server_trigger_words"].remove(word)
-                await self.update_server_settings(guild_id, settings)
-                return True
-            return False
-        except Exception as e:
-            logger.error(f"Error removing server trigger word: {e}")
-            return False
+        word = _normalize_trigger_word(word)
+        
+        def mutate(settings):
+            words = settings.get("server_trigger_words", set())
+            if word not in words:
+                return False
+            words.discard(word)
+        return await self._mutate_server_settings(guild_id, mutate)
 
     # Channel Activation Methods
     async def set_channel_activation(self, guild_id: int, channel_id: int, enabled: bool):
         """Set channel-specific activation status"""
-        try:
-            settings = await self.get_server_settings(guild_id)
-            if "activated_channels" not in settings:
-                settings["activated_channels"] = {}
-            
-            settings["activated_channels"][str(channel_id)] = enabled
-            await self.update_server_settings(guild_id, settings)
-        except Exception as e:
-            logger.error(f"Error setting channel activation: {e}")
+        def mutate(settings):
+            settings.setdefault("activated_channels", {})[channel_id] = enabled
+        await self._mutate_server_settings(guild_id, mutate)
 
     async def is_channel_activated(self, guild_id: int, channel_id: int) -> bool:
         """Check if a specific channel is activated"""
-        try:
-            settings = await self.get_server_settings(guild_id)
-            activated_channels = settings.get("activated_channels", {})
-            return activated_channels.get(str(channel_id), False)
-        except Exception as e:
-            logger.error(f"Error checking channel activation: {e}")
-            return False
+        view = await self.guild_view(guild_id)
+        return view.activated_channels.get(channel_id, False)
         
     # Revive Chat Methods
-    async def get_revive_chat_settings(self, guild_id: int) -> Dict[str, Any]:
+    async def get_revive_chat_settings(self, guild_id: int) -> Mapping[str, Any]:
         """Get revive chat settings for a guild"""
-        try:
-            data = await self._read_json(self.revive_chat_file)
-            return data.get(str(guild_id), {
-                'enabled': False,
-                'channel_id': None,
-                'role_id': None,
-                'interval_minutes': 60,
-                'next_send_time': None
-            })
-        except Exception as e:
-            logger.error(f"Error getting revive chat settings: {e}")
-            return {
-                'enabled': False,
-                'channel_id': None,
-                'role_id': None,
-                'interval_minutes': 60,
-                'next_send_time': None
-            }
+        settings = await self.read_server_settings(guild_id)
+        return settings.get("revive_chat", _DEFAULT_REVIVE_CHAT_SETTINGS)
 
     async def set_revive_chat_settings(self, guild_id: int, settings: Dict[str, Any]):
         """Set revive chat settings for a guild"""
-        try:
-            data = await self._read_json(self.revive_chat_file)
-            data[str(guild_id)] = settings
-            await self._write_json(self.revive_chat_file, data)
-        except Exception as e:
-            logger.error(f"Error setting revive chat settings: {e}")
+        def mutate(server_settings):
+            server_settings["revive_chat"] = settings
+        await self._mutate_server_settings(guild_id, mutate)
 
     async def update_revive_chat_next_time(self, guild_id: int, next_time: str):
         """Update the next send time for revive chat"""
-        try:
-            data = await self._read_json(self.revive_chat_file)
-            if str(guild_id) in data:
-                data[str(guild_id)]['next_send_time'] = next_time
-                await self._write_json(self.revive_chat_file, data)
-        except Exception as e:
-            logger.error(f"Error updating revive chat next time: {e}")
+        async with self._mutation_lock(self.server_settings_file):
+            data = await self._read_json(self.server_settings_file)
+            revive_chat = data.get(guild_id, {}).get("revive_chat")
+            if revive_chat is not None:
+                # Not part of any GuildView, so the cached views stay valid
+                revive_chat['next_send_time'] = next_time
+                self._mark_dirty(self.server_settings_file)
 
     async def disable_revive_chat(self, guild_id: int):
         """Disable revive chat for a guild"""
-        try:
-            data = await self._read_json(self.revive_chat_file)
-            if str(guild_id) in data:
-                data[str(guild_id)]['enabled'] = False
-                await self._write_json(self.revive_chat_file, data)
-        except Exception as e:
-            logger.error(f"Error disabling revive chat: {e}")
+        def mutate(settings):
+            revive_chat = settings.get("revive_chat")
+            if not revive_chat or not revive_chat.get('enabled', False):
+                return False
+            revive_chat['enabled'] = False
+        await self._mutate_server_settings(guild_id, mutate)
             
     # Bot-to-Bot Conversation Methods
     async def set_bot_to_bot_enabled(self, guild_id: int, channel_id: int, enabled: bool):
         """Set bot-to-bot conversation status for a specific channel"""
-        try:
-            settings = await self.get_server_settings(guild_id)
-            if "bot_to_bot_channels" not in settings:
-                settings["bot_to_bot_channels"] = {}
-            
-            settings["bot_to_bot_channels"][str(channel_id)] = enabled
-            await self.update_server_settings(guild_id, settings)
-        except Exception as e:
-            logger.error(f"Error setting bot-to-bot status: {e}")
+        def mutate(settings):
+            settings.setdefault("bot_to_bot_channels", {})[channel_id] = enabled
+        await self._mutate_server_settings(guild_id, mutate)
 
     async def is_bot_to_bot_enabled(self, guild_id: int, channel_id: int) -> bool:
         """Check if bot-to-bot conversation is enabled for a specific channel"""
-        try:
-            settings = await self.get_server_settings(guild_id)
-            bot_to_bot_channels = settings.get("bot_to_bot_channels", {})
-            return bot_to_bot_channels.get(str(channel_id), False)
-        except Exception as e:
-            logger.error(f"Error checking bot-to-bot status: {e}")
-            return False
+        view = await self.guild_view(guild_id)
+        return view.bot_to_bot_channels.get(channel_id, False)
         
     # Welcome Settings Methods
-    async def get_welcome_settings(self, guild_id: int) -> Dict[str, Any]:
+    async def get_welcome_settings(self, guild_id: int) -> Mapping[str, Any]:
         """Get welcome settings for a guild"""
-        try:
-            settings = await self.get_server_settings(guild_id)
-            return settings.get("welcome_settings", {
-                'enabled': False,
-                'channel_id': None
-            })
-        except Exception as e:
-            logger.error(f"Error getting welcome settings: {e}")
-            return {
-                'enabled': False,
-                'channel_id': None
-            }
+        settings = await self.read_server_settings(guild_id)
+        return settings.get("welcome_settings", _DEFAULT_WELCOME_SETTINGS)
 
     async def set_welcome_settings(self, guild_id: int, enabled: bool, channel_id: Optional[int] = None):
         """Set welcome settings for a guild"""
-        try:
-            settings = await self.get_server_settings(guild_id)
+        def mutate(settings):
             settings["welcome_settings"] = {
                 'enabled': enabled,
                 'channel_id': channel_id
             }
-            await self.update_server_settings(guild_id, settings)
-        except Exception as e:
-            logger.error(f"Error setting welcome settings: {e}")
+        await self._mutate_server_settings(guild_id, mutate)